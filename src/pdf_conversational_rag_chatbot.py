@@ -1,7 +1,8 @@
 import os
 import uuid
+import threading
 import pymupdf4llm
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterator, Tuple, Callable
 
 from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
@@ -18,6 +19,61 @@ from langchain.retrievers import ContextualCompressionRetriever
 from langchain.retrievers.document_compressors import CrossEncoderReranker
 from langchain_community.cross_encoders import HuggingFaceCrossEncoder
 
+DEFAULT_EMBEDDING_MODEL = "BAAI/bge-m3"
+RERANKER_MODEL = "BAAI/bge-reranker-large"
+
+# Shared model weights, loaded at most once per process even when
+# requested from several threads at the same time
+_loaded_models: Dict[Tuple[str, str], Any] = {}
+_model_load_lock = threading.Lock()
+
+def _load_once(kind: str, model_name: str, loader: Callable[[str], Any]) -> Any:
+    with _model_load_lock:
+        key = (kind, model_name)
+        if key not in _loaded_models:
+            _loaded_models[key] = loader(model_name)
+        return _loaded_models[key]
+
+def get_embedding_model(model_name: str) -> HuggingFaceBgeEmbeddings:
+    """
+    Load an embedding model once per process and reuse it across PDFs
+    
+    Parameters:
+    -----------
+    model_name : str
+        Hugging Face embedding model name
+    """
+    return _load_once(
+        "embedding", model_name,
+        lambda name: HuggingFaceBgeEmbeddings(model_name=name)
+    )
+
+def get_reranker_model(model_name: str) -> HuggingFaceCrossEncoder:
+    """
+    Load a cross-encoder reranker once per process and reuse it across PDFs
+    
+    Parameters:
+    -----------
+    model_name : str
+        Hugging Face cross-encoder model name
+    """
+    return _load_once(
+        "reranker", model_name,
+        lambda name: HuggingFaceCrossEncoder(model_name=name)
+    )
+
+def preload_models(embedding_model: str = DEFAULT_EMBEDDING_MODEL) -> None:
+    """
+    Load the embedding and reranker weights ahead of the first PDF upload
+    
+    Parameters:
+    -----------
+    embedding_model : str, optional
+        Embedding model to preload (default: BAAI/bge-m3)
+    """
+    get_embedding_model(embedding_model)
+    get_reranker_model(RERANKER_MODEL)
+
 class PDFChatbot:
     """
     A comprehensive PDF Chatbot using Retrieval-Augmented Generation (RAG)
@@ -33,7 +89,7 @@ class PDFChatbot:
         self, 
         pdf_path: str, 
         google_api_key: str, 
-        embedding_model: str = "BAAI/bge-m3",
+        embedding_model: str = DEFAULT_EMBEDDING_MODEL,
         chunk_size: int = 600, 
         chunk_overlap: int = 90,
         temperature: float = 0.0
@@ -73,7 +129,7 @@ class PDFChatbot:
         texts = text_splitter.split_documents(pages)
         
         # Embeddings
-        self.embedding_model = HuggingFaceBgeEmbeddings(model_name=embedding_model)
+        self.embedding_model = get_embedding_model(embedding_model)
         chunks = [doc.page_content for doc in texts]
         embeddings = self.embedding_model.embed_documents(chunks)
         
@@ -102,7 +158,7 @@ class PDFChatbot:
         )
         
         # Reranker
-        reranker_model = HuggingFaceCrossEncoder(model_name="BAAI/bge-reranker-large")
+        reranker_model = get_reranker_model(RERANKER_MODEL)
         compressor = CrossEncoderReranker(model=reranker_model, top_n=3)
         compression_retriever = ContextualCompressionRetriever(
             base_compressor=compressor, 
@@ -136,6 +192,7 @@ class PDFChatbot:
             "don't know. Answer only based on the provided content. "
             "If the question is not relevant to the provided context, "
             "say the question is not relevant."
+            "{summary}"
             "\n\n"
             "{context}"
         )
@@ -175,7 +232,8 @@ class PDFChatbot:
     def chat(
         self, 
         query: str, 
-        session_id: Optional[str] = None
+        session_id: Optional[str] = None,
+        summary: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Send a query to the chatbot and get a response
@@ -186,6 +244,8 @@ class PDFChatbot:
             User's input query
         session_id : str, optional
             Specific session ID to maintain conversation context
+        summary : str, optional
+            Summary of earlier turns no longer kept in the chat history
         
         Returns:
         --------
@@ -196,12 +256,100 @@ class PDFChatbot:
         
         # Invoke the chain
         result = self.conversational_rag_chain.invoke(
-            {"input": query},
+            {"input": query, "summary": self._format_summary(summary)},
             config={"configurable": {"session_id": current_session_id}},
         )
         
         return result
     
+    def stream_chat(
+        self, 
+        query: str, 
+        session_id: Optional[str] = None,
+        summary: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Send a query to the chatbot and stream the answer as it is generated
+        
+        Parameters:
+        -----------
+        query : str
+            User's input query
+        session_id : str, optional
+            Specific session ID to maintain conversation context
+        summary : str, optional
+            Summary of earlier turns no longer kept in the chat history
+        
+        Yields:
+        -------
+        Chunks of the answer text
+        """
+        # Use default session ID if not provided
+        current_session_id = session_id or self.default_session_id
+        
+        # Stream the chain; retrieval keys arrive first, answer tokens after
+        for chunk in self.conversational_rag_chain.stream(
+            {"input": query, "summary": self._format_summary(summary)},
+            config={"configurable": {"session_id": current_session_id}},
+        ):
+            if "answer" in chunk:
+                yield chunk["answer"]
+    
+    def summarize(
+        self, 
+        messages: List[Dict[str, str]], 
+        previous_summary: Optional[str] = None
+    ) -> str:
+        """
+        Condense chat messages into a short summary
+        
+        Parameters:
+        -----------
+        messages : List[Dict[str, str]]
+            Messages with "role" and "content" keys, oldest first
+        previous_summary : str, optional
+            Summary of even older messages to fold into the result
+        
+        Returns:
+        --------
+        Summary text
+        """
+        transcript = "\n".join(
+            f"{message['role']}: {message['content']}" for message in messages
+        )
+        if previous_summary:
+            transcript = f"Earlier summary: {previous_summary}\n{transcript}"
+        
+        response = self.llm.invoke(
+            "Summarize the following conversation about a document in a few "
+            "sentences. Keep the questions asked and the key facts given in "
+            "the answers.\n\n" + transcript
+        )
+        return response.content
+    
+    def trim_history(self, keep_last: int, session_id: Optional[str] = None) -> None:
+        """
+        Keep only the most recent messages of a session's history
+        
+        Parameters:
+        -----------
+        keep_last : int
+            Number of most recent messages to keep
+        session_id : str, optional
+            Session ID to trim. If None, trims default session.
+        """
+        current_session_id = session_id or self.default_session_id
+        
+        if current_session_id in self.store:
+            history = self.store[current_session_id]
+            history.messages = history.messages[-keep_last:] if keep_last else []
+    
+    @staticmethod
+    def _format_summary(summary: Optional[str]) -> str:
+        if not summary:
+            return ""
+        return f"\n\nSummary of the earlier conversation: {summary}"
+    
     def clear_history(self, session_id: Optional[str] = None) -> None:
         """
         Clear conversation history for a specific or default session
@@ -1,15 +1,19 @@
 import os
+import logging
 from PIL import Image
 import torch
-from transformers import Qwen2VLForConditionalGeneration, AutoProcessor
-from typing import Dict, Union, List
+from transformers import Qwen2VLForConditionalGeneration, AutoProcessor, BitsAndBytesConfig
+from typing import Dict, Union, List, Optional
+
+logger = logging.getLogger(__name__)
 
 class QwenVLDescriptionGenerator:
     def __init__(self, 
                  model_name: str = "models\qwen2_vl_2b_instruct_local", 
                  min_pixels: int = 256 * 28 * 28, 
                  max_pixels: int = 720 * 28 * 28,
-                 device: str = "auto"):
+                 device: str = "auto",
+                 quantization: Optional[str] = None):
         """
         Initialize the Qwen-VL Description Generator.
         
@@ -18,12 +22,39 @@ class QwenVLDescriptionGenerator:
             min_pixels (int): Minimum pixel count for image processing
             max_pixels (int): Maximum pixel count for image processing
             device (str): Device to run the model on (auto, cuda, cpu)
+            quantization (str, optional): Load weights as "int8" or "int4"
+                (bitsandbytes). Ignored with a warning without CUDA or when
+                device is "cpu", where the model loads unquantized.
+        
+        Raises:
+            ValueError: If quantization is not None, "int8" or "int4"
         """
+        if quantization not in (None, "int8", "int4"):
+            raise ValueError(f"Unsupported quantization: {quantization}")
+        
+        # bitsandbytes kernels are CUDA-only
+        quantization_config = None
+        if quantization and (device == "cpu" or not torch.cuda.is_available()):
+            logger.warning(
+                "%s quantization requires a CUDA device; loading %s unquantized",
+                quantization, model_name
+            )
+        elif quantization:
+            if quantization == "int4":
+                quantization_config = BitsAndBytesConfig(
+                    load_in_4bit=True,
+                    bnb_4bit_compute_dtype=torch.float16,
+                    bnb_4bit_quant_type="nf4"
+                )
+            else:
+                quantization_config = BitsAndBytesConfig(load_in_8bit=True)
+        
         # Load the model and processor
         self.model = Qwen2VLForConditionalGeneration.from_pretrained(
             model_name, 
-            torch_dtype="auto", 
-            device_map=device
+            torch_dtype=torch.float16 if quantization_config else "auto", 
+            device_map=device,
+            quantization_config=quantization_config
         )
         
         # Create processor with resolution limits
@@ -1,18 +1,40 @@
 import os
+import time
 import uuid
+import shutil
+import hashlib
+import threading
 import streamlit as st
 import tempfile
 import torch
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 # Import custom classes
 from whisper_transcription_app import AudioTranscriber
-from pdf_conversational_rag_chatbot import PDFChatbot
+from pdf_conversational_rag_chatbot import PDFChatbot, preload_models
 
-import os
-import uuid
-import streamlit as st
-import tempfile
-import torch
+TEMP_DIR = "temp"
+UPLOAD_CHUNK_SIZE = 1 << 16
+TRANSCRIPTION_POLL_INTERVAL = 0.5
+MAX_TRANSCRIPTION_JOBS = 32
+# Each cached PDFChatbot holds a FAISS index, BM25 corpus and LLM client
+MAX_CACHED_CHATBOTS = 8
+CHATBOT_CACHE_TTL = 60 * 60
+# Chat history is trimmed back to CHAT_HISTORY_KEEP messages once it
+# exceeds CHAT_HISTORY_LIMIT; trimmed turns are folded into a summary
+CHAT_HISTORY_LIMIT = 40
+CHAT_HISTORY_KEEP = 20
+
+# Processing route for each accepted upload extension
+FILE_KIND_BY_EXTENSION = {
+    '.wav': 'media',
+    '.mp3': 'media',
+    '.mp4': 'media',
+    '.avi': 'media',
+    '.mov': 'media',
+    '.pdf': 'pdf',
+}
 
 def setup_page_config():
     """Configure Streamlit page settings"""
@@ -28,8 +50,12 @@ def initialize_session_state():
         st.session_state.transcription_text = None
     if 'pdf_path' not in st.session_state:
         st.session_state.pdf_path = None
+    if 'pdf_hash' not in st.session_state:
+        st.session_state.pdf_hash = None
     if 'chatbot' not in st.session_state:
         st.session_state.chatbot = None
+    if 'chatbot_key' not in st.session_state:
+        st.session_state.chatbot_key = None
     if 'session_id' not in st.session_state:
         st.session_state.session_id = str(uuid.uuid4())
     if 'show_transcription_text' not in st.session_state:
@@ -38,13 +64,130 @@ def initialize_session_state():
         st.session_state.file_type = None
     if 'pdf_uploaded_directly' not in st.session_state:
         st.session_state.pdf_uploaded_directly = False
+    if 'last_upload_id' not in st.session_state:
+        st.session_state.last_upload_id = None
+    if 'last_upload_digest' not in st.session_state:
+        st.session_state.last_upload_digest = None
+    if 'archived_summary' not in st.session_state:
+        st.session_state.archived_summary = None
+
+@st.cache_resource(show_spinner="Loading transcription model...")
+def get_audio_transcriber():
+    """Load the Whisper transcriber once per process and share it across sessions"""
+    return AudioTranscriber()
+
+@st.cache_resource(
+    show_spinner="Initializing RAG Pipeline...",
+    max_entries=MAX_CACHED_CHATBOTS,
+    ttl=CHATBOT_CACHE_TTL
+)
+def get_pdf_chatbot(pdf_hash, _pdf_path, google_api_key):
+    """Build a PDFChatbot once per (document content, API key) pair.
+
+    The path is excluded from the cache key (leading underscore) because
+    transcription-derived PDFs get a fresh temporary name on every run.
+    """
+    return PDFChatbot(
+        pdf_path=_pdf_path,
+        google_api_key=google_api_key
+    )
+
+def warm_up_models():
+    """Load model weights so the first upload does not wait on initialization"""
+    get_audio_transcriber()
+    preload_models()
+
+@st.cache_resource
+def start_model_warmup():
+    """Start warming model caches on a daemon thread, once per process"""
+    warmup_thread = threading.Thread(target=warm_up_models, daemon=True)
+    warmup_thread.start()
+    return warmup_thread
+
+@st.cache_resource
+def get_transcription_executor():
+    """Single worker thread that runs Whisper off the script thread"""
+    return ThreadPoolExecutor(max_workers=1)
+
+@st.cache_resource
+def get_transcription_jobs():
+    """Transcription futures keyed by file content hash, oldest first, shared across sessions"""
+    return OrderedDict()
+
+@st.cache_resource
+def get_transcription_jobs_lock():
+    """Lock guarding the shared transcription jobs; sessions run on separate threads"""
+    return threading.Lock()
+
+def submit_transcription(file_hash, file_path):
+    """Return the transcription future for a file, starting it only once per content"""
+    transcriber = get_audio_transcriber()
+    jobs = get_transcription_jobs()
+    with get_transcription_jobs_lock():
+        if file_hash in jobs:
+            jobs.move_to_end(file_hash)
+            return jobs[file_hash]
+
+        job = get_transcription_executor().submit(transcriber.transcribe, file_path)
+        jobs[file_hash] = job
+
+        # Evict the least recently used finished jobs beyond the limit;
+        # in-flight jobs are kept so they stay deduplicated
+        for stale_hash in [h for h, f in jobs.items() if f.done()]:
+            if len(jobs) <= MAX_TRANSCRIPTION_JOBS:
+                break
+            del jobs[stale_hash]
+        return job
+
+def discard_transcription(file_hash, job):
+    """Forget a failed transcription job so the next run retries it"""
+    jobs = get_transcription_jobs()
+    with get_transcription_jobs_lock():
+        if jobs.get(file_hash) is job:
+            del jobs[file_hash]
+
+def compute_file_hash(uploaded_file):
+    """Return a content hash identifying an uploaded file"""
+    digest = hashlib.blake2b(digest_size=16)
+    uploaded_file.seek(0)
+    for chunk in iter(lambda: uploaded_file.read(UPLOAD_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
 
 def save_uploaded_file(uploaded_file):
-    initialize_session_state()
-    """Save uploaded file to a temporary location"""
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as temp_file:
-        temp_file.write(uploaded_file.getvalue())
-        return temp_file.name
+    """Save uploaded file under a content-addressed name in the temp directory.
+
+    Returns the saved path and the file's content hash. The hash is reused
+    while Streamlit reports the same upload, and files already on disk are
+    not rewritten.
+    """
+    if st.session_state.last_upload_id == uploaded_file.file_id:
+        file_hash = st.session_state.last_upload_digest
+    else:
+        file_hash = compute_file_hash(uploaded_file)
+        st.session_state.last_upload_id = uploaded_file.file_id
+        st.session_state.last_upload_digest = file_hash
+
+    file_extension = os.path.splitext(uploaded_file.name)[1].lower()
+    file_path = os.path.join(TEMP_DIR, f"{file_hash}{file_extension}")
+    if not os.path.exists(file_path):
+        # Only reached when writing; recreates the directory if it was cleaned up
+        os.makedirs(TEMP_DIR, exist_ok=True)
+        # Stream in chunks to a uniquely named partial file and rename it into
+        # place, so a partial or concurrent write is never mistaken for a
+        # complete upload
+        uploaded_file.seek(0)
+        partial_file = tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(file_path), suffix=".part", delete=False
+        )
+        try:
+            with partial_file:
+                shutil.copyfileobj(uploaded_file, partial_file, length=UPLOAD_CHUNK_SIZE)
+            os.replace(partial_file.name, file_path)
+        finally:
+            if os.path.exists(partial_file.name):
+                os.remove(partial_file.name)
+    return file_path, file_hash
 
 def create_pdf_from_text(text, prefix='transcription'):
     """Create a temporary PDF from transcribed text"""
@@ -94,9 +237,112 @@ def create_pdf_from_text(text, prefix='transcription'):
     c.save()
     return temp_pdf_path
 
+def load_active_chatbot(google_api_key):
+    """Make the current document's chatbot the session's active one.
+
+    Returns True if the active chatbot changed. The session keeps its own
+    reference, so a chatbot evicted from the shared cache is not rebuilt
+    mid-conversation. Switching documents starts a fresh conversation, so
+    the chat history and summary of the previous document do not carry over.
+    """
+    chatbot_key = (st.session_state.pdf_hash, google_api_key)
+    if st.session_state.chatbot is not None and st.session_state.chatbot_key == chatbot_key:
+        return False
+    # Chatbots are shared across sessions, so clear this session's
+    # conversation on both the outgoing and incoming instance
+    if st.session_state.chatbot:
+        st.session_state.chatbot.clear_history(st.session_state.session_id)
+    st.session_state.chatbot = get_pdf_chatbot(
+        st.session_state.pdf_hash,
+        st.session_state.pdf_path,
+        google_api_key
+    )
+    st.session_state.chatbot.clear_history(st.session_state.session_id)
+    st.session_state.chatbot_key = chatbot_key
+    st.session_state.messages = []
+    st.session_state.archived_summary = None
+    return True
+
+def stream_with_spinner(chunks, text):
+    """Show a spinner until the first non-empty chunk of a stream arrives"""
+    chunks = iter(chunks)
+    with st.spinner(text):
+        for first_chunk in chunks:
+            if first_chunk:
+                break
+        else:
+            return
+    yield first_chunk
+    yield from chunks
+
+@st.fragment
+def render_chat_interface():
+    """Render the Q&A chat; submissions rerun only this fragment, not the whole page"""
+    st.header("Ask Questions about the Document")
+    
+    if "messages" not in st.session_state:
+        st.session_state.messages = []
+
+    # Display chat messages
+    for message in st.session_state.messages:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+
+    # Chat input
+    if prompt := st.chat_input("What would you like to know?"):
+        # Add user message to chat history
+        st.session_state.messages.append({
+            "role": "user", 
+            "content": prompt
+        })
+
+        # Display user message
+        with st.chat_message("user"):
+            st.markdown(prompt)
+
+        # Get chatbot response
+        with st.chat_message("assistant"):
+            # Question rephrasing, retrieval and reranking run before the
+            # first answer token, so keep a spinner up until it arrives
+            response = st.write_stream(stream_with_spinner(
+                st.session_state.chatbot.stream_chat(
+                    prompt, 
+                    session_id=st.session_state.session_id,
+                    summary=st.session_state.archived_summary
+                ),
+                "Generating response..."
+            ))
+
+        # Add assistant message to chat history
+        st.session_state.messages.append({
+            "role": "assistant", 
+            "content": response
+        })
+
+        # Bound history size: summarize the oldest turns and drop them
+        # once the summary exists, so a failed call loses nothing
+        if len(st.session_state.messages) > CHAT_HISTORY_LIMIT:
+            archived = st.session_state.messages[:-CHAT_HISTORY_KEEP]
+            try:
+                with st.spinner("Summarizing earlier conversation..."):
+                    summary = st.session_state.chatbot.summarize(
+                        archived,
+                        previous_summary=st.session_state.archived_summary
+                    )
+            except Exception as e:
+                st.warning(f"Could not summarize earlier conversation: {e}")
+            else:
+                st.session_state.archived_summary = summary
+                st.session_state.messages = st.session_state.messages[-CHAT_HISTORY_KEEP:]
+                st.session_state.chatbot.trim_history(
+                    CHAT_HISTORY_KEEP,
+                    session_id=st.session_state.session_id
+                )
+
 def main():
     setup_page_config()
     initialize_session_state()
+    start_model_warmup()
 
     st.title("Media Conversation App")
     st.write("Transcription & Q&A Assistant")
@@ -104,7 +350,7 @@ def main():
     # File Upload Section
     uploaded_file = st.file_uploader(
         "Upload Audio/Video/PDF File", 
-        type=['wav', 'mp3', 'mp4', 'avi', 'mov', 'pdf']
+        type=[ext.lstrip('.') for ext in FILE_KIND_BY_EXTENSION]
     )
 
     # Mode and Text Visibility Section
@@ -135,41 +381,53 @@ def main():
         file_extension = os.path.splitext(uploaded_file.name)[1].lower()
         # st.session_state.chatbot = None
         # Save uploaded file
-        temp_file_path = save_uploaded_file(uploaded_file)
+        temp_file_path, file_hash = save_uploaded_file(uploaded_file)
         st.session_state.file_type = file_extension
+        file_kind = FILE_KIND_BY_EXTENSION.get(file_extension)
 
         # PDF Upload Handling
-        if file_extension == '.pdf':
+        if file_kind == 'pdf':
             st.session_state.pdf_path = temp_file_path
+            st.session_state.pdf_hash = file_hash
             st.session_state.transcription_text = None  # Reset transcription text
             st.session_state.pdf_uploaded_directly = True
             
-            # Automatically initialize RAG pipeline for PDF only if not already initialized
-            if st.session_state.chatbot is None:
-                with st.spinner("Initializing RAG Pipeline for PDF..."):
-                    st.session_state.chatbot = PDFChatbot(
-                        pdf_path=st.session_state.pdf_path,
-                        google_api_key=google_api_key
-                    )
+            # Automatically initialize RAG pipeline for PDF; re-selecting the
+            # same document hits the resource cache
+            if load_active_chatbot(google_api_key):
                 st.success("PDF Loaded and RAG Pipeline Initialized!")
 
         # Audio/Video Transcription
-        elif file_extension in ['.wav', '.mp3', '.mp4', '.avi', '.mov']:
+        elif file_kind == 'media':
             # Reset PDF direct upload flag
             st.session_state.pdf_uploaded_directly = False
             
             # Transcription Mode
             if mode == "Transcription":
-                with st.spinner("Transcribing..."):
-                    transcriber = AudioTranscriber()
-                    transcription_result = transcriber.transcribe(temp_file_path)
+                transcription_job = submit_transcription(file_hash, temp_file_path)
+                
+                # Poll the background job so the page stays responsive
+                if not transcription_job.done():
+                    with st.spinner("Transcribing..."):
+                        time.sleep(TRANSCRIPTION_POLL_INTERVAL)
+                    st.rerun()
+                
+                try:
+                    transcription_result = transcription_job.result()
+                except Exception as e:
+                    print(f"Transcription error: {e}")
+                    transcription_result = None
+                
+                if transcription_result is None:
+                    discard_transcription(file_hash, transcription_job)
+                    st.error("Transcription failed. Please try again or upload a different file.")
+                elif transcription_result and st.session_state.pdf_hash != file_hash:
+                    st.session_state.transcription_text = transcription_result
+                    st.session_state.pdf_path = create_pdf_from_text(transcription_result)
+                    st.session_state.pdf_hash = file_hash
                     
-                    if transcription_result:
-                        st.session_state.transcription_text = transcription_result
-                        st.session_state.pdf_path = create_pdf_from_text(transcription_result)
-                        
-                        st.success("Transcription Complete!")
-                        st.session_state.show_transcription_text = True
+                    st.success("Transcription Complete!")
+                    st.session_state.show_transcription_text = True
 
         # Q&A Mode
         if mode == "Question Answering":
@@ -177,15 +435,11 @@ def main():
             if st.session_state.pdf_path is None:
                 st.warning("Please upload a PDF or transcribe an audio/video file first.")
 
-            # Initialize RAG pipeline only for transcribed files, not for directly uploaded PDFs
+            # Initialize RAG pipeline only for transcribed files, not for directly uploaded PDFs;
+            # nothing is rebuilt unless the transcript changed
             if (st.session_state.pdf_path and 
-                st.session_state.chatbot is None and 
                 not st.session_state.pdf_uploaded_directly):
-                with st.spinner("Initializing RAG Pipeline..."):
-                    st.session_state.chatbot = PDFChatbot(
-                        pdf_path=st.session_state.pdf_path,
-                        google_api_key=google_api_key
-                    )
+                load_active_chatbot(google_api_key)
 
         # Transcription Text Display (Always Accessible)
         if st.session_state.transcription_text and st.session_state.show_transcription_text:
@@ -199,46 +453,15 @@ def main():
 
         # Chat Interface for Q&A Mode
         if mode == "Question Answering" and st.session_state.chatbot:
-            st.header("Ask Questions about the Document")
-            
-            if "messages" not in st.session_state:
-                st.session_state.messages = []
-
-            # Display chat messages
-            for message in st.session_state.messages:
-                with st.chat_message(message["role"]):
-                    st.markdown(message["content"])
-
-            # Chat input
-            if prompt := st.chat_input("What would you like to know?"):
-                # Add user message to chat history
-                st.session_state.messages.append({
-                    "role": "user", 
-                    "content": prompt
-                })
-
-                # Display user message
-                with st.chat_message("user"):
-                    st.markdown(prompt)
-
-                # Get chatbot response
-                with st.chat_message("assistant"):
-                    with st.spinner("Generating response..."):
-                        response = st.session_state.chatbot.chat(
-                            prompt, 
-                            session_id=st.session_state.session_id
-                        )
-                        st.markdown(response['answer'])
-
-                # Add assistant message to chat history
-                st.session_state.messages.append({
-                    "role": "assistant", 
-                    "content": response['answer']
-                })
+            render_chat_interface()
 
     # Cleanup and reset
     st.sidebar.header("Session Management")
     if st.sidebar.button("Reset Session"):
+        # Chatbots are shared across sessions, so clear this session's
+        # conversation instead of dropping the object
+        if st.session_state.chatbot:
+            st.session_state.chatbot.clear_history(st.session_state.session_id)
         for key in list(st.session_state.keys()):
             del st.session_state[key]
         initialize_session_state()